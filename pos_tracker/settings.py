@@ -108,13 +108,16 @@ WSGI_APPLICATION = "pos_tracker.wsgi.application"
 #             'autocommit': True,
 #         },
 #         'TIME_ZONE': 'Asia/Riyadh',
-#         'CONN_MAX_AGE': 300,  # Optional: keep connections alive longer
+#         'CONN_MAX_AGE': 60,  # Reuse connections across requests
+#         'CONN_HEALTH_CHECKS': True,  # Drop dead persistent connections before use
 #     }
 # }
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        'CONN_MAX_AGE': 60,  # Reuse connections across requests
+        'CONN_HEALTH_CHECKS': True,  # Drop dead persistent connections before use
     }
 }
 
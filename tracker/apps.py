@@ -11,3 +11,10 @@ class TrackerConfig(AppConfig):
             from . import signals  # noqa: F401
         except Exception:
             pass
+
+        # Format and write log records on a background thread
+        try:
+            from .utils.log_queue import start_log_queue
+            start_log_queue()
+        except Exception:
+            pass
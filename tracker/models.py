@@ -207,6 +207,10 @@ class Order(models.Model):
             models.Index(fields=["status"], name="idx_order_status"),
             models.Index(fields=["type"], name="idx_order_type"),
             models.Index(fields=["created_at"], name="idx_order_created"),
+            # Started-order KPIs: branch + status='created' + started_at range
+            models.Index(fields=["branch", "status", "started_at"], name="idx_order_br_status_start"),
+            # Overrun reports: branch + status='completed' ordered by completed_at
+            models.Index(fields=["branch", "status", "completed_at"], name="idx_order_br_status_done"),
         ]
 
     def _generate_order_number(self) -> str:
@@ -286,6 +286,45 @@ class CustomerService:
                 return existing, False
             raise
 
+    @staticmethod
+    def get_or_create_plate_customer(
+        branch: Optional[Branch],
+        plate_number: str,
+    ) -> Tuple[Customer, bool]:
+        """
+        Get or create the placeholder customer used when an order is started from a plate number only.
+        Placeholders are identified by branch + phone "PLATE_<plate>", so a single indexed lookup
+        replaces the name/phone normalization scan done by create_or_get_customer.
+
+        Args:
+            branch: User's branch
+            plate_number: Vehicle plate number (normalized to upper case)
+
+        Returns:
+            Tuple of (Customer, created: bool)
+        """
+        plate_number = (plate_number or "").strip().upper()
+        if not plate_number:
+            raise ValueError("Plate number is required")
+
+        phone = f"PLATE_{plate_number}"
+        customer = Customer.objects.filter(branch=branch, phone=phone).order_by('id').first()
+        if customer:
+            return customer, False
+
+        now = timezone.now()
+        customer = Customer.objects.create(
+            branch=branch,
+            full_name=f"Plate {plate_number}",
+            phone=phone,
+            customer_type='personal',
+            arrival_time=now,
+            current_status='arrived',
+            last_visit=now,
+            total_visits=1,
+        )
+        return customer, True
+
     @staticmethod
     def update_customer_visit(customer: Customer) -> None:
         """
@@ -624,6 +663,59 @@ class OrderService:
             logger.error(f"Error creating order: {e}")
             raise
 
+    @staticmethod
+    def create_with_relations(
+        branch: Optional[Branch],
+        customer_data: Dict[str, Any],
+        vehicle_data: Optional[Dict[str, Any]] = None,
+        order_data: Optional[Dict[str, Any]] = None
+    ) -> Tuple[Customer, Optional[Vehicle], Order]:
+        """
+        Create/get a customer, create/get their vehicle and create an order in one transaction.
+        Used by the quick-create modal; unlike create_complete_order_flow the order fields are
+        passed straight to Order (no type whitelist) and no extra visit-tracking UPDATE is issued.
+        When the customer was just created it cannot own a vehicle yet, so the vehicle lookup
+        is skipped and the vehicle is inserted directly.
+
+        Args:
+            branch: User's branch
+            customer_data: Keyword arguments for CustomerService.create_or_get_customer
+            vehicle_data: Dict with plate_number, make, model (optional)
+            order_data: Order field values (type, status, description, priority, ...)
+
+        Returns:
+            Tuple of (customer, vehicle, order)
+        """
+        with transaction.atomic():
+            customer, created = CustomerService.create_or_get_customer(branch=branch, **customer_data)
+
+            vehicle = None
+            plate_number = ((vehicle_data or {}).get('plate_number') or '').strip().upper()
+            if plate_number:
+                if created:
+                    vehicle = Vehicle.objects.create(
+                        customer=customer,
+                        plate_number=plate_number,
+                        make=vehicle_data.get('make') or None,
+                        model=vehicle_data.get('model') or None,
+                    )
+                else:
+                    vehicle = VehicleService.create_or_get_vehicle(
+                        customer=customer,
+                        plate_number=plate_number,
+                        make=vehicle_data.get('make'),
+                        model=vehicle_data.get('model'),
+                    )
+
+            order = Order.objects.create(
+                customer=customer,
+                vehicle=vehicle,
+                branch=branch,
+                **(order_data or {})
+            )
+
+        return customer, vehicle, order
+
     @staticmethod
     def create_complete_order_flow(
         branch: Optional[Branch],
@@ -1,7 +1,10 @@
 from django.contrib.auth.signals import user_logged_in, user_logged_out, user_login_failed
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
 from django.utils import timezone
-from .utils import add_audit_log
+from .models import ServiceType, ServiceAddon, InventoryItem, Brand
+from .utils import add_audit_log, bump_service_types_version
 
 
 def _client_ip(request):
@@ -32,3 +35,13 @@ def on_user_login_failed(sender, credentials, request, **kwargs):
     ua = (request.META.get('HTTP_USER_AGENT') if request else '') or ''
     ua = ua[:200]
     add_audit_log(None, 'login_failed', f'Username: {username} from {ip or "?"} UA: {ua}')
+
+@receiver([post_save, post_delete], sender=ServiceType)
+@receiver([post_save, post_delete], sender=ServiceAddon)
+@receiver([post_save, post_delete], sender=InventoryItem)
+@receiver([post_save, post_delete], sender=Brand)
+def on_service_catalog_changed(sender, **kwargs):
+    # Cached api_service_types payloads are keyed by version; bumping it invalidates them.
+    # Bump only after commit, otherwise a concurrent cache miss could store the
+    # pre-commit catalog under the new version.
+    transaction.on_commit(bump_service_types_version)
@@ -0,0 +1,117 @@
+import json
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib.messages import get_messages
+from django.core.cache import cache
+from django.test import TestCase, Client
+from django.urls import reverse
+from django.utils import timezone
+from django.contrib.auth.models import User
+from tracker.models import Order, Customer, Branch, Profile, Invoice, Brand, InventoryItem, ServiceType
+
+
+class StartedOrderTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.user = User.objects.create_user(username='tester', password='pass')
+        self.branch = Branch.objects.create(name='B1', code='B1')
+        Profile.objects.create(user=self.user, branch=self.branch)
+        self.customer = Customer.objects.create(branch=self.branch, full_name='John Doe', phone='123')
+        self.order = Order.objects.create(
+            order_number='O100', branch=self.branch, customer=self.customer, type='service', status='created'
+        )
+        self.detail_url = reverse('tracker:started_order_detail', kwargs={'order_id': self.order.pk})
+        self.client.login(username='tester', password='pass')
+
+    def test_manual_invoice_line_items_get_computed_totals(self):
+        self.client.post(self.detail_url, {
+            'action': 'create_invoice_manual',
+            'item_description[]': ['Oil change', 'Tyre', 'Bad row', ''],
+            'item_qty[]': ['2', '1', 'x', '1'],
+            'item_price[]': ['10', '1,250.50', '5', '1'],
+        })
+        inv = Invoice.objects.get(order=self.order)
+        items = {li.description: li for li in inv.line_items.all()}
+        self.assertEqual(set(items), {'Oil change', 'Tyre'})
+        self.assertEqual(items['Oil change'].line_total, Decimal('20'))
+        self.assertEqual(items['Tyre'].line_total, Decimal('1250.50'))
+        self.assertEqual(items['Tyre'].tax_amount, Decimal('0'))
+        self.assertEqual(inv.subtotal, Decimal('1270.50'))
+        self.assertEqual(inv.total_amount, Decimal('1270.50'))
+
+    def test_complete_order_is_idempotent(self):
+        self.client.post(self.detail_url, {'action': 'complete_order'})
+        self.order.refresh_from_db()
+        self.assertEqual(self.order.status, 'completed')
+        completed_at = self.order.completed_at
+        self.assertIsNotNone(completed_at)
+
+        resp = self.client.post(self.detail_url, {'action': 'complete_order'})
+        self.assertEqual(resp.status_code, 302)
+        self.order.refresh_from_db()
+        self.assertEqual(self.order.completed_at, completed_at)
+        self.assertIn('already completed', [str(m) for m in get_messages(resp.wsgi_request)][-1])
+
+    def test_record_overrun_reason(self):
+        url = reverse('tracker:api_report_overrun', kwargs={'order_id': self.order.pk})
+        resp = self.client.post(url, data=json.dumps({'reason': ' Parts delayed '}), content_type='application/json')
+        self.assertEqual(resp.status_code, 200)
+        self.order.refresh_from_db()
+        self.assertEqual(self.order.overrun_reason, 'Parts delayed')
+        self.assertEqual(self.order.overrun_reported_by_id, self.user.pk)
+        self.assertIsNotNone(self.order.overrun_reported_at)
+
+        resp = self.client.post(url, data=json.dumps({'reason': ['x']}), content_type='application/json')
+        self.assertEqual(resp.status_code, 400)
+
+    def test_record_overrun_reason_missing_order_returns_404(self):
+        other_branch = Branch.objects.create(name='B2', code='B2')
+        other = Order.objects.create(order_number='O200', branch=other_branch, customer=self.customer, type='service')
+        for order_id in (other.pk, other.pk + 1000):
+            url = reverse('tracker:api_report_overrun', kwargs={'order_id': order_id})
+            resp = self.client.post(url, data=json.dumps({'reason': 'late'}), content_type='application/json')
+            self.assertEqual(resp.status_code, 404)
+        other.refresh_from_db()
+        self.assertIsNone(other.overrun_reason)
+
+    def test_service_types_etag(self):
+        url = reverse('tracker:api_service_types')
+        ServiceType.objects.create(name='Oil', estimated_minutes=20)
+        InventoryItem.objects.create(name='Free valve', brand=Brand.objects.create(name='BR'), quantity=1, price=0)
+        resp = self.client.get(url)
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(json.loads(resp.content)['inventory_items'][0]['price'], '0.00')
+        etag = resp['ETag']
+
+        resp = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(resp.status_code, 304)
+        self.assertEqual(resp['ETag'], etag)
+
+        # The version bump is deferred to transaction commit
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            ServiceType.objects.create(name='Wash', estimated_minutes=10)
+            resp = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+            self.assertEqual(resp.status_code, 304)
+        self.assertEqual(len(callbacks), 1)
+        resp = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(resp.status_code, 200)
+        self.assertNotEqual(resp['ETag'], etag)
+        self.assertEqual(len(json.loads(resp.content)['service_types']), 2)
+
+    def test_overrun_report_refreshes_after_complete_order(self):
+        url = reverse('tracker:overrun_reports')
+        self.assertEqual(self.client.get(url).context['total_overruns'], 0)
+
+        Order.objects.filter(pk=self.order.pk).update(
+            type='inquiry', status='in_progress', estimated_duration=10,
+            started_at=timezone.now() - timedelta(minutes=60),
+        )
+        self.client.post(reverse('tracker:complete_order', kwargs={'pk': self.order.pk}))
+        self.order.refresh_from_db()
+        self.assertEqual(self.order.status, 'completed')
+
+        resp = self.client.get(url)
+        self.assertEqual(resp.context['total_overruns'], 1)
+        self.assertEqual([o['id'] for o in resp.context['recent_overruns']], [self.order.pk])
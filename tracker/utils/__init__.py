@@ -9,6 +9,7 @@ import base64
 import json
 from urllib import request, parse
 import re
+import time
 
 from django.core.cache import cache
 from django.utils import timezone
@@ -126,10 +127,26 @@ def clear_audit_logs() -> None:
 # ---- Branch scoping helpers ----------------------------------------------
 
 def get_user_branch(user):
-    """Return Branch instance assigned to user's profile, if any."""
+    """Return Branch instance assigned to user's profile, if any.
+    The result is memoized on the user object (request.user lives for one request),
+    and the profile and branch are loaded with a single joined query.
+    """
     try:
-        p = getattr(user, 'profile', None)
-        return getattr(p, 'branch', None)
+        if hasattr(user, '_branch_cache'):
+            return user._branch_cache
+        if getattr(user, 'pk', None) is None:
+            return None
+        if 'profile' in user._state.fields_cache:
+            p = user.profile
+        else:
+            from ..models import Profile  # type: ignore
+            p = Profile.objects.select_related('branch').filter(user_id=user.pk).first()
+            if p is not None:
+                # Let later user.profile accesses (templates, context processors) reuse this row
+                user._state.fields_cache['profile'] = p
+        branch = getattr(p, 'branch', None)
+        user._branch_cache = branch
+        return branch
     except Exception:
         return None
 
@@ -187,6 +204,53 @@ def clear_inventory_cache(name: str | None = None, brand: str | None = None) ->
         pass
 
 
+# ---- Service catalog cache ------------------------------------------------
+
+SERVICE_TYPES_VERSION_KEY = 'svc_types_ver'
+
+
+def get_service_types_version() -> int:
+    """Return the current version of the cached service types/addons/items payload.
+
+    New versions are seeded from time.time_ns() so a lost or evicted counter never
+    falls back onto a version whose payload may still be cached.
+    """
+    try:
+        return cache.get_or_set(SERVICE_TYPES_VERSION_KEY, time.time_ns, None) or time.time_ns()
+    except Exception:
+        return time.time_ns()
+
+
+def bump_service_types_version() -> None:
+    """Invalidate the cached service types payload by moving to a new version key."""
+    try:
+        try:
+            cache.incr(SERVICE_TYPES_VERSION_KEY)
+        except ValueError:
+            # Key missing (e.g. evicted); start from a fresh, never-used version
+            cache.set(SERVICE_TYPES_VERSION_KEY, time.time_ns(), None)
+    except Exception:
+        pass
+
+
+# ---- Overrun report cache -------------------------------------------------
+
+def overrun_report_cache_key(branch_id: int | None) -> str:
+    """Cache key for a branch's overrun report page data (None = all branches)."""
+    return f"overrun_summary:{branch_id if branch_id else 'all'}"
+
+
+def invalidate_overrun_report(branch_id: int | None) -> None:
+    """Drop the cached overrun report for a branch and the all-branches view.
+
+    Call after an order is completed or an overrun reason is recorded.
+    """
+    try:
+        cache.delete_many([overrun_report_cache_key(branch_id), overrun_report_cache_key(None)])
+    except Exception:
+        pass
+
+
 def adjust_inventory(name: str, brand: str, qty_delta: int) -> tuple[bool, str, int | None]:
     """Adjust inventory by name+brand with qty_delta (negative to deduct, positive to restock).
     Returns (ok, status, remaining_qty). status in {ok, not_found, invalid}.
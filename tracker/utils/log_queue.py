@@ -0,0 +1,70 @@
+"""
+Move log output off the request thread.
+
+The root logger's handlers (console + debug.log, see settings.LOGGING) are replaced
+with a single QueueHandler; a QueueListener thread formats exc_info tracebacks
+and writes records to the original handlers.
+"""
+
+import atexit
+import logging
+import os
+import queue
+from logging.handlers import QueueHandler, QueueListener
+
+_listener = None
+_queue_handler = None
+
+
+class DeferredQueueHandler(QueueHandler):
+    """QueueHandler that renders the message but leaves exc_info to the listener.
+
+    The stdlib prepare() runs the full formatter, traceback included, on the calling
+    thread. Only ``msg % args`` is resolved here, so the listener never touches
+    request-thread objects (or their lazy DB lookups); the queue is in-process, so
+    the traceback can be formatted later on the listener thread.
+    """
+
+    def prepare(self, record):
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+
+def start_log_queue():
+    """Route root logging through a background listener. Safe to call more than once."""
+    global _listener, _queue_handler
+    if _listener is not None:
+        return
+    root = logging.getLogger()
+    handlers = [h for h in root.handlers if not isinstance(h, QueueHandler)]
+    if not handlers:
+        return
+
+    log_queue = queue.SimpleQueue()
+    _listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+    for handler in handlers:
+        root.removeHandler(handler)
+    _queue_handler = DeferredQueueHandler(log_queue)
+    root.addHandler(_queue_handler)
+    _listener.start()
+    atexit.register(_stop_listener)
+    # Forked workers (gunicorn --preload, uWSGI prefork, test --parallel) inherit the
+    # queue handler but not the listener thread, so each child starts its own.
+    os.register_at_fork(after_in_child=_restart_in_child)
+
+
+def _stop_listener():
+    if _listener is not None:
+        _listener.stop()
+
+
+def _restart_in_child():
+    """Give a forked process a fresh queue and listener thread over the same handlers."""
+    global _listener
+    if _listener is None:
+        return
+    log_queue = queue.SimpleQueue()
+    _queue_handler.queue = log_queue
+    _listener = QueueListener(log_queue, *_listener.handlers, respect_handler_level=True)
+    _listener.start()
@@ -26,7 +26,7 @@ from django.views.decorators.csrf import csrf_exempt
 from django.core.exceptions import ValidationError
 from .models import Profile, Customer, Order, Vehicle, InventoryItem, CustomerNote, Brand, Branch, OrderAttachment, ServiceType, ServiceAddon
 from django.core.paginator import Paginator
-from .utils import add_audit_log, get_audit_logs, clear_audit_logs, scope_queryset, get_user_branch
+from .utils import add_audit_log, get_audit_logs, clear_audit_logs, scope_queryset, get_user_branch, invalidate_overrun_report
 from .utils.pdf_signature import (
     embed_signature_in_pdf,
     SignatureEmbedError,
@@ -3126,6 +3126,7 @@ def complete_order(request: HttpRequest, pk: int):
         o.signed_by = request.user
         o.signed_at = now
         o.save(update_fields=['status','started_at','completed_at','completion_date','actual_duration','signed_by','signed_at'])
+        invalidate_overrun_report(o.branch_id)
         messages.success(request, 'Inquiry marked as completed.')
         return redirect('tracker:order_detail', pk=o.id)
 
@@ -3394,6 +3395,7 @@ def complete_order(request: HttpRequest, pk: int):
         pass
 
     o.save()
+    invalidate_overrun_report(o.branch_id)
     try:
         add_audit_log(request.user, 'order_completed', f"Order {o.order_number} completed with digital signature")
     except Exception:
@@ -3489,6 +3491,7 @@ def sign_order_document(request: HttpRequest, pk: int):
         adjust_inventory(order.item_name, order.brand, (order.quantity or 0))
 
     order.save(update_fields=['status', 'completed_at', 'completion_date', 'actual_duration', 'signed_by', 'signed_at'])
+    invalidate_overrun_report(order.branch_id)
 
     try:
         add_audit_log(request.user, 'order_completed', f"Order {order.order_number} signed and archived as PDF")
@@ -3608,6 +3611,7 @@ def sign_existing_document(request: HttpRequest, pk: int):
     order.signed_by = request.user
     order.signed_at = now
     order.save(update_fields=['status', 'started_at', 'completed_at', 'completion_date', 'actual_duration', 'signed_by', 'signed_at'])
+    invalidate_overrun_report(order.branch_id)
 
     messages.success(request, 'Signed copy created and attached to the order.')
     return redirect('tracker:order_detail', pk=order.id)
@@ -3,24 +3,92 @@ Views for quick order start workflow and started orders management.
 Allows users to quickly start an order with plate number, then complete the order.
 """
 
+import hashlib
 import json
 import logging
-from datetime import datetime
-from decimal import Decimal
+from datetime import datetime, time, timedelta
+from decimal import Decimal, InvalidOperation
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
-from django.http import JsonResponse, HttpRequest
+from django.http import JsonResponse, HttpResponse, HttpRequest
 from django.views.decorators.http import require_http_methods
 from django.utils import timezone
-from django.db import transaction
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.db import IntegrityError, transaction
+from django.db.models import Count, Prefetch, Q
 
 from .models import Order, Customer, Vehicle, Branch, ServiceType, ServiceAddon, InventoryItem, Invoice, InvoiceLineItem
-from .utils import get_user_branch
-from .services import OrderService
+from .utils import get_user_branch, get_service_types_version, overrun_report_cache_key, invalidate_overrun_report
+from .services import CustomerService, VehicleService, OrderService
 
 logger = logging.getLogger(__name__)
 
+# orjson is much faster than the stdlib for the small request/response bodies these
+# endpoints handle; fall back to json when it is not installed.
+if orjson is not None:
+    _loads = orjson.loads
+
+    def _dumps(data):
+        return orjson.dumps(data, default=str)
+else:
+    _loads = json.loads
+
+    def _dumps(data):
+        return json.dumps(data, default=str).encode()
+
+# Allowed values for validated request fields
+_START_ORDER_TYPES = frozenset({'service', 'sales', 'inquiry'})
+_VALID_ORDER_TYPES = frozenset({'service', 'sales', 'inquiry', 'upload'})
+_VALID_CUSTOMER_TYPES = frozenset({'personal', 'company', 'government', 'ngo'})
+_ORG_CUSTOMERS = frozenset({'company', 'government', 'ngo'})
+_VALID_PRIORITIES = frozenset({'low', 'medium', 'high', 'urgent'})
+
+# Description lines replaced when services/add-ons are re-selected on a started order
+_SKIP_PREFIXES = ('services:', 'add-ons:', 'tire services:')
+
+# Form fields read by api_create_order_from_modal, with the default used when a field is absent
+_MODAL_FIELDS = (
+    ('order_type', 'service'),
+    ('customer_type', 'personal'),
+    ('personal_subtype', ''),
+    ('organization_name', ''),
+    ('tax_number', ''),
+    ('customer_name', ''),
+    ('phone', ''),
+    ('email', ''),
+    ('address', ''),
+    ('description', ''),
+    ('estimated_duration', ''),
+    ('priority', 'medium'),
+    ('plate_number', ''),
+    ('vehicle_make', ''),
+    ('vehicle_model', ''),
+)
+
+# Seconds the overrun report page data is served from cache
+_OVERRUN_SUMMARY_TTL = 300
+
+# Strips thousands separators from posted amounts before Decimal parsing
+_DEC_TRANS = str.maketrans('', '', ',')
+
+
+def ojson(data, status=200):
+    """JsonResponse equivalent serialized with orjson when available (Decimals are emitted as strings)."""
+    return HttpResponse(_dumps(data), status=status, content_type='application/json')
+
+
+def oloads(body):
+    """Parse a JSON request body (orjson when available, else json)."""
+    return _loads(body)
+
 
 @login_required
 @require_http_methods(["POST"])
@@ -41,7 +109,7 @@ def api_start_order(request):
     If an order with status='created' already exists for this plate, return that order instead of creating a duplicate.
     """
     try:
-        data = json.loads(request.body)
+        data = oloads(request.body)
         plate_number = (data.get('plate_number') or '').strip().upper()
         order_type = data.get('order_type', 'service')
         use_existing = data.get('use_existing_customer', False)
@@ -50,26 +118,36 @@ def api_start_order(request):
         estimated_duration = data.get('estimated_duration')
 
         if not plate_number:
-            return JsonResponse({'success': False, 'error': 'Vehicle plate number is required'}, status=400)
+            return ojson({'success': False, 'error': 'Vehicle plate number is required'}, status=400)
 
-        if order_type not in ['service', 'sales', 'inquiry']:
-            return JsonResponse({'success': False, 'error': 'Invalid order type'}, status=400)
+        if order_type not in _START_ORDER_TYPES:
+            return ojson({'success': False, 'error': 'Invalid order type'}, status=400)
 
         user_branch = get_user_branch(request.user)
 
         # Check for existing started order for this plate (status='created')
         # If one exists and hasn't been updated yet, return it instead of creating a duplicate
-        existing_vehicle = Vehicle.objects.filter(plate_number__iexact=plate_number, customer__branch=user_branch).select_related('customer').first()
+        # The vehicle's created orders are prefetched so the lookup is reused below without a second query
+        existing_vehicle = Vehicle.objects.filter(
+            plate_number__iexact=plate_number,
+            customer__branch=user_branch
+        ).select_related('customer').prefetch_related(
+            Prefetch(
+                'orders',
+                queryset=Order.objects.filter(status='created').only(
+                    'id', 'vehicle', 'order_number', 'started_at'
+                ).order_by('-created_at'),
+                to_attr='created_orders',
+            )
+        ).first()
+        existing_order = None
         if existing_vehicle:
             # Check if there's already a created order for this vehicle
-            existing_order = Order.objects.filter(
-                vehicle=existing_vehicle,
-                status='created'
-            ).order_by('-created_at').first()
+            existing_order = existing_vehicle.created_orders[0] if existing_vehicle.created_orders else None
 
             if existing_order and not use_existing and not existing_customer_id:
                 # Return existing order instead of creating a duplicate
-                return JsonResponse({
+                return ojson({
                     'success': True,
                     'order_id': existing_order.id,
                     'order_number': existing_order.order_number,
@@ -81,7 +159,7 @@ def api_start_order(request):
 
             if not use_existing and not existing_customer_id:
                 # Inform frontend that a customer exists for this plate
-                return JsonResponse({
+                return ojson({
                     'success': True,
                     'existing_customer': {
                         'id': existing_vehicle.customer.id,
@@ -96,8 +174,6 @@ def api_start_order(request):
                     }
                 }, status=200)
 
-        from .services import CustomerService, VehicleService
-
         with transaction.atomic():
             # Decide which customer to use
             if use_existing and existing_customer_id:
@@ -108,25 +184,12 @@ def api_start_order(request):
                     plate_number=plate_number
                 )
             else:
-                # Create or get temporary customer record for this branch using the service
+                # Create or get the placeholder customer for this plate in the branch
                 # This avoids duplicate "Pending - T XXX" records
-                try:
-                    customer, _ = CustomerService.create_or_get_customer(
-                        branch=user_branch,
-                        full_name=f"Plate {plate_number}",
-                        phone=f"PLATE_{plate_number}",  # Use plate as identifier instead of "TEMP_"
-                        customer_type='personal',
-                    )
-                except Exception:
-                    # Fallback if service fails - use get_or_create with unique constraint fields
-                    customer, _ = Customer.objects.get_or_create(
-                        branch=user_branch,
-                        full_name=f"Plate {plate_number}",
-                        phone=f"PLATE_{plate_number}",
-                        organization_name=None,
-                        tax_number=None,
-                        defaults={'customer_type': 'personal'}
-                    )
+                customer, _ = CustomerService.get_or_create_plate_customer(
+                    branch=user_branch,
+                    plate_number=plate_number,
+                )
 
                 vehicle = VehicleService.create_or_get_vehicle(
                     customer=customer,
@@ -136,10 +199,14 @@ def api_start_order(request):
             # Calculate estimated duration from selected services if provided
             try:
                 if service_selection and order_type == 'service':
-                    svc_objs = ServiceType.objects.filter(name__in=service_selection, is_active=True)
-                    from .models import ServiceAddon
-                    add_objs = ServiceAddon.objects.filter(name__in=service_selection)
-                    total_minutes = sum(int(s.estimated_minutes or 0) for s in svc_objs) + sum(int(a.estimated_minutes or 0) for a in add_objs)
+                    # Fetch service and add-on minutes in one UNION ALL query
+                    svc_minutes = ServiceType.objects.filter(
+                        name__in=service_selection, is_active=True
+                    ).order_by().values_list('estimated_minutes', flat=True)
+                    addon_minutes = ServiceAddon.objects.filter(
+                        name__in=service_selection
+                    ).order_by().values_list('estimated_minutes', flat=True)
+                    total_minutes = sum(m or 0 for m in svc_minutes.union(addon_minutes, all=True))
                     if total_minutes:
                         estimated_duration = total_minutes
             except Exception:
@@ -151,10 +218,12 @@ def api_start_order(request):
                 desc += ": " + ", ".join(service_selection)
 
             # Create the order only if one doesn't already exist for this vehicle
-            existing_order = Order.objects.filter(
-                vehicle=vehicle,
-                status='created'
-            ).first()
+            if not existing_vehicle or not vehicle or vehicle.pk != existing_vehicle.pk:
+                # Only the fields returned in the response are needed from an existing order
+                existing_order = Order.objects.filter(
+                    vehicle=vehicle,
+                    status='created'
+                ).only('id', 'order_number', 'started_at').first()
 
             if existing_order:
                 order = existing_order
@@ -172,13 +241,13 @@ def api_start_order(request):
                     estimated_duration=estimated_duration if estimated_duration else None,
                 )
 
-        return JsonResponse({'success': True, 'order_id': order.id, 'order_number': order.order_number, 'plate_number': plate_number, 'started_at': order.started_at.isoformat()}, status=201)
+        return ojson({'success': True, 'order_id': order.id, 'order_number': order.order_number, 'plate_number': plate_number, 'started_at': order.started_at.isoformat()}, status=201)
 
     except json.JSONDecodeError:
-        return JsonResponse({'success': False, 'error': 'Invalid JSON'}, status=400)
+        return ojson({'success': False, 'error': 'Invalid JSON'}, status=400)
     except Exception as e:
         logger.error(f"Error starting order: {str(e)}")
-        return JsonResponse({'success': False, 'error': f'Server error: {str(e)}'}, status=500)
+        return ojson({'success': False, 'error': f'Server error: {str(e)}'}, status=500)
 
 
 @login_required
@@ -186,60 +255,115 @@ def api_start_order(request):
 def api_check_plate(request):
     """Check if a plate number exists under the current branch and return customer/vehicle info."""
     try:
-        data = json.loads(request.body)
+        data = oloads(request.body)
         plate_number = (data.get('plate_number') or '').strip().upper()
         if not plate_number:
-            return JsonResponse({'found': False})
+            return ojson({'found': False})
 
         user_branch = get_user_branch(request.user)
         vehicle = Vehicle.objects.filter(plate_number__iexact=plate_number, customer__branch=user_branch).select_related('customer').first()
         if not vehicle:
-            return JsonResponse({'found': False})
+            return ojson({'found': False})
 
-        return JsonResponse({'found': True, 'customer': {'id': vehicle.customer.id, 'full_name': vehicle.customer.full_name, 'phone': vehicle.customer.phone}, 'vehicle': {'id': vehicle.id, 'plate': vehicle.plate_number, 'make': vehicle.make, 'model': vehicle.model}})
+        return ojson({'found': True, 'customer': {'id': vehicle.customer.id, 'full_name': vehicle.customer.full_name, 'phone': vehicle.customer.phone}, 'vehicle': {'id': vehicle.id, 'plate': vehicle.plate_number, 'make': vehicle.make, 'model': vehicle.model}})
     except Exception as e:
         logger.error(f"Error checking plate: {e}")
-        return JsonResponse({'found': False, 'error': str(e)}, status=500)
+        return ojson({'found': False, 'error': str(e)}, status=500)
 
 
 @login_required
 @require_http_methods(["GET"])
 def api_service_types(request):
-    """Return list of active service types, addons, and inventory items for UI."""
+    """Return list of active service types, addons, and inventory items for UI.
+
+    The serialized payload is cached under a version key that is bumped whenever
+    a ServiceType, ServiceAddon, InventoryItem or Brand is saved or deleted.
+    It is cached together with a weak ETag hashed from the payload bytes, so
+    unchanged clients get a 304 and any content change yields a new ETag.
+    """
     try:
-        svc_qs = ServiceType.objects.filter(is_active=True).order_by('name')
-        service_types = [{'name': s.name, 'estimated_minutes': s.estimated_minutes or 0} for s in svc_qs]
-
-        addon_qs = ServiceAddon.objects.filter(is_active=True).order_by('name')
-        service_addons = [{'name': a.name, 'estimated_minutes': a.estimated_minutes or 0} for a in addon_qs]
-
-        items_qs = InventoryItem.objects.select_related('brand').filter(is_active=True).order_by('brand__name', 'name')
-        inventory_items = []
-        for item in items_qs:
-            brand_name = item.brand.name if item.brand else 'Unbranded'
-            inventory_items.append({
-                'id': item.id,
-                'name': item.name,
-                'brand': brand_name,
-                'quantity': item.quantity or 0,
-                'price': float(item.price or 0)
+        cache_key = f"svc_types_v{get_service_types_version()}"
+        cached = cache.get(cache_key)
+        if cached is not None:
+            etag, payload = cached
+        else:
+            svc_qs = ServiceType.objects.filter(is_active=True).order_by('name')
+            service_types = [{'name': s.name, 'estimated_minutes': s.estimated_minutes or 0} for s in svc_qs]
+
+            addon_qs = ServiceAddon.objects.filter(is_active=True).order_by('name')
+            service_addons = [{'name': a.name, 'estimated_minutes': a.estimated_minutes or 0} for a in addon_qs]
+
+            items_qs = InventoryItem.objects.select_related('brand').filter(is_active=True).order_by('brand__name', 'name')
+            inventory_items = []
+            for item in items_qs:
+                brand_name = item.brand.name if item.brand else 'Unbranded'
+                inventory_items.append({
+                    'id': item.id,
+                    'name': item.name,
+                    'brand': brand_name,
+                    'quantity': item.quantity or 0,
+                    'price': item.price,
+                })
+
+            logger.debug(f"api_service_types: Returning {len(inventory_items)} inventory items")
+            payload = _dumps({
+                'service_types': service_types,
+                'service_addons': service_addons,
+                'inventory_items': inventory_items
             })
-
-        logger.debug(f"api_service_types: Returning {len(inventory_items)} inventory items")
-        return JsonResponse({
-            'service_types': service_types,
-            'service_addons': service_addons,
-            'inventory_items': inventory_items
-        })
+            etag = f'W/"svc-{hashlib.blake2b(payload, digest_size=8).hexdigest()}"'
+            cache.set(cache_key, (etag, payload), 3600)
+
+        if request.META.get('HTTP_IF_NONE_MATCH') == etag:
+            response = HttpResponse(status=304)
+            response['ETag'] = etag
+            return response
+        response = HttpResponse(payload, content_type='application/json')
+        response['ETag'] = etag
+        response['Cache-Control'] = 'private, max-age=60'
+        return response
     except Exception as e:
         logger.error(f"Error fetching service types: {e}", exc_info=True)
-        return JsonResponse({
+        return ojson({
             'service_types': [],
             'service_addons': [],
             'inventory_items': []
         }, status=500)
 
 
+def _day_bounds(day):
+    """Return aware [start, end) datetimes for a local date, for index-friendly range filters."""
+    start = timezone.make_aware(datetime.combine(day, time.min))
+    end = timezone.make_aware(datetime.combine(day + timedelta(days=1), time.min))
+    return start, end
+
+
+def _started_order_stats(branch, today):
+    """
+    KPI counts for started (status='created') orders in a branch:
+    total_started, today_started and repeated_vehicles_today (plates with 2+ orders started today).
+    Both order counts come from one conditional aggregate; the repeated-vehicle count is a
+    single grouped COUNT over the same base queryset.
+    """
+    # Range predicates (rather than started_at__date) keep started_at usable by the index
+    day_start, day_end = _day_bounds(today)
+    started_today = Q(started_at__gte=day_start, started_at__lt=day_end)
+    started_qs = Order.objects.filter(branch=branch, status='created')
+    stats = started_qs.aggregate(
+        total=Count('id'),
+        today=Count('id', filter=started_today),
+    )
+    repeated_vehicles_today = started_qs.filter(
+        started_today,
+        vehicle__isnull=False
+    ).values('vehicle__plate_number').annotate(order_count=Count('id')).filter(order_count__gte=2).count()
+    return {
+        'total_started': stats['total'],
+        'today_started': stats['today'],
+        'repeated_vehicles_today': repeated_vehicles_today,
+    }
+
+
 @login_required
 def started_orders_dashboard(request):
     """
@@ -257,6 +381,8 @@ def started_orders_dashboard(request):
     status_filter = request.GET.get('status', '')
     sort_by = request.GET.get('sort_by', '-started_at')
     search_query = request.GET.get('search', '').strip()
+    # Computed once and shared by the default filter and the statistics below
+    today = timezone.localdate()
 
     # Default behavior: show created, in_progress, and today's completed orders
     # This keeps recently completed orders visible on the dashboard
@@ -268,66 +394,53 @@ def started_orders_dashboard(request):
         ).select_related('customer', 'vehicle')
     else:
         # Default: show active orders (created/in_progress) + completed from today
-        from django.db.models import Q
-        today = timezone.now().date()
+        day_start, day_end = _day_bounds(today)
         orders = Order.objects.filter(
             branch=user_branch
         ).filter(
             Q(status__in=['created', 'in_progress']) |  # All active orders
-            Q(status='completed', completed_at__date=today)  # Completed today
+            Q(status='completed', completed_at__gte=day_start, completed_at__lt=day_end)  # Completed today
         ).select_related('customer', 'vehicle')
 
     # Apply search filter
     if search_query:
         orders = orders.filter(
-            vehicle__plate_number__icontains=search_query
-        ) | orders.filter(
-            customer__full_name__icontains=search_query
+            Q(vehicle__plate_number__icontains=search_query) |
+            Q(customer__full_name__icontains=search_query)
         )
 
-    # Apply sorting
-    if sort_by in ['-started_at', 'started_at', 'plate_number', 'type']:
+    # Only load the columns the dashboard cards render
+    orders = orders.only(
+        'id', 'order_number', 'status', 'type', 'description', 'created_at', 'started_at',
+        'customer__id', 'customer__full_name', 'customer__phone',
+        'vehicle__id', 'vehicle__plate_number', 'vehicle__make', 'vehicle__model',
+    )
+
+    # Apply sorting (plate number lives on the related vehicle)
+    if sort_by == 'plate_number':
+        orders = orders.order_by('vehicle__plate_number', '-started_at')
+    elif sort_by in ['-started_at', 'started_at', 'type']:
         orders = orders.order_by(sort_by)
     else:
         orders = orders.order_by('-started_at')
 
-    # Group orders by plate number
+    # Fetch the rows exactly once: the template renders every order card, so the
+    # grouping below and the template share this list rather than a streamed iterator.
+    orders = list(orders)
+
+    # Group orders by plate number in a single pass; each group keeps the requested sort order
     orders_by_plate = {}
     for order in orders:
         plate = order.vehicle.plate_number if order.vehicle else 'Unknown'
-        if plate not in orders_by_plate:
-            orders_by_plate[plate] = []
-        orders_by_plate[plate].append(order)
+        orders_by_plate.setdefault(plate, []).append(order)
 
     # Calculate statistics
-    # Include all started orders for accurate counts
-    total_started = Order.objects.filter(
-        branch=user_branch,
-        status='created'
-    ).count()
-
-    today_started = Order.objects.filter(
-        branch=user_branch,
-        status='created',
-        started_at__date=timezone.now().date()
-    ).count()
-
-    # Calculate repeated vehicles today (vehicles with 2+ orders started today)
-    from django.db.models import Count
-    today_orders = Order.objects.filter(
-        branch=user_branch,
-        status='created',
-        started_at__date=timezone.now().date(),
-        vehicle__isnull=False
-    ).values('vehicle__plate_number').annotate(order_count=Count('id')).filter(order_count__gte=2)
-    repeated_vehicles_today = today_orders.count()
+    stats = _started_order_stats(user_branch, today)
 
     context = {
         'orders': orders,
         'orders_by_plate': orders_by_plate,
-        'total_started': total_started,
-        'today_started': today_started,
-        'repeated_vehicles_today': repeated_vehicles_today,
+        **stats,
         'search_query': search_query,
         'status_filter': status_filter,
         'sort_by': sort_by,
@@ -372,54 +485,65 @@ def started_order_detail(request, order_id):
                 except Exception:
                     invoice_date = timezone.localdate()
 
-                # Create invoice
-                inv = Invoice()
-                inv.branch = user_branch
-                inv.order = order
-                inv.customer = order.customer
-                inv.reference = invoice_number
-                inv.invoice_date = invoice_date
-                inv.notes = notes
-                inv.subtotal = Decimal(str(subtotal or '0').replace(',', ''))
-                inv.tax_amount = Decimal(str(tax_amount or '0').replace(',', ''))
-                inv.total_amount = Decimal(str(total_amount or '0').replace(',', ''))
-                inv.created_by = request.user
-                inv.generate_invoice_number()
-                inv.save()
-
-                # Add line items
+                # Build line items up front; rows with unparsable qty/price are skipped
                 item_descriptions = request.POST.getlist('item_description[]')
                 item_qtys = request.POST.getlist('item_qty[]')
                 item_prices = request.POST.getlist('item_price[]')
 
+                line_items = []
                 for desc, qty, price in zip(item_descriptions, item_qtys, item_prices):
                     if desc and desc.strip():
                         try:
-                            line = InvoiceLineItem(
-                                invoice=inv,
-                                description=desc.strip(),
-                                quantity=int(qty or 1),
-                                unit_price=Decimal(str(price or '0').replace(',', ''))
-                            )
-                            line.save()
-                        except Exception as e:
+                            quantity = Decimal(int(qty or 1))
+                            unit_price = Decimal((price or '0').translate(_DEC_TRANS))
+                        except (ValueError, InvalidOperation) as e:
                             logger.warning(f"Failed to create invoice line item: {e}")
-
-                # Recalculate totals
-                inv.calculate_totals()
-                inv.save()
+                            continue
+                        # bulk_create skips InvoiceLineItem.save(), so set the computed totals here
+                        line_items.append(InvoiceLineItem(
+                            description=desc.strip(),
+                            quantity=quantity,
+                            unit_price=unit_price,
+                            line_total=quantity * unit_price,
+                            tax_amount=Decimal('0'),
+                        ))
 
                 # IMPORTANT: Preserve extracted Net, VAT, and Gross values from the form submission
                 # This ensures extracted invoice data is preserved for dashboard KPI calculations
-                extracted_subtotal = Decimal(str(subtotal or '0').replace(',', ''))
-                extracted_tax = Decimal(str(tax_amount or '0').replace(',', ''))
-                extracted_total = Decimal(str(total_amount or '0').replace(',', ''))
-
-                # Only override if extracted values are provided (non-zero)
-                if extracted_subtotal > 0 or extracted_tax > 0 or extracted_total > 0:
+                extracted_subtotal = Decimal((subtotal or '0').translate(_DEC_TRANS))
+                extracted_tax = Decimal((tax_amount or '0').translate(_DEC_TRANS))
+                extracted_total = Decimal((total_amount or '0').translate(_DEC_TRANS))
+
+                with transaction.atomic():
+                    # Create invoice
+                    inv = Invoice()
+                    inv.branch = user_branch
+                    inv.order = order
+                    inv.customer = order.customer
+                    inv.reference = invoice_number
+                    inv.invoice_date = invoice_date
+                    inv.notes = notes
                     inv.subtotal = extracted_subtotal
                     inv.tax_amount = extracted_tax
-                    inv.total_amount = extracted_total or (extracted_subtotal + extracted_tax)
+                    inv.total_amount = extracted_total
+                    inv.created_by = request.user
+                    inv.generate_invoice_number()
+                    inv.save()
+
+                    # Add line items in a single INSERT
+                    for line in line_items:
+                        line.invoice = inv
+                    if line_items:
+                        InvoiceLineItem.objects.bulk_create(line_items, batch_size=100)
+
+                    # Recalculate totals
+                    inv.calculate_totals()
+
+                    # Only override if extracted values are provided (non-zero)
+                    if extracted_subtotal > 0 or extracted_tax > 0 or extracted_total > 0:
+                        inv.subtotal = extracted_subtotal
+                        inv.tax_amount = extracted_tax
+                        inv.total_amount = extracted_total or (extracted_subtotal + extracted_tax)
                     inv.save(update_fields=['subtotal', 'tax_amount', 'total_amount'])
 
                 # Update started order if applicable
@@ -466,7 +590,7 @@ def started_order_detail(request, order_id):
             personal_subtype = request.POST.get('personal_subtype', '').strip()
             if personal_subtype:
                 order.customer.personal_subtype = personal_subtype
-            order.customer.save()
+            order.customer.save(update_fields=['full_name', 'phone', 'email', 'address', 'customer_type', 'personal_subtype'])
             
         elif action == 'update_vehicle':
             # Update vehicle details
@@ -474,7 +598,7 @@ def started_order_detail(request, order_id):
                 order.vehicle.make = request.POST.get('make', order.vehicle.make)
                 order.vehicle.model = request.POST.get('model', order.vehicle.model)
                 order.vehicle.vehicle_type = request.POST.get('vehicle_type', order.vehicle.vehicle_type)
-                order.vehicle.save()
+                order.vehicle.save(update_fields=['make', 'model', 'vehicle_type'])
 
         elif action == 'update_order_details':
             # Update selected services, add-ons, items, and estimated duration
@@ -483,17 +607,20 @@ def started_order_detail(request, order_id):
                 est = request.POST.get('estimated_duration') or None
                 item_id = request.POST.get('item_id') or None
                 item_quantity = request.POST.get('item_quantity') or None
+                # Columns assigned below; the order is only saved when something changed
+                dirty_fields = []
 
                 # Handle item/brand update for sales orders
                 if order.type == 'sales' and item_id:
                     try:
-                        from .models import InventoryItem
-                        item = InventoryItem.objects.select_related('brand').get(id=int(item_id))
+                        item = InventoryItem.objects.select_related('brand').only('name', 'brand__name').get(id=int(item_id))
                         order.item_name = item.name
                         order.brand = item.brand.name if item.brand else 'Unbranded'
+                        dirty_fields += ['item_name', 'brand']
                         if item_quantity:
                             try:
                                 order.quantity = int(item_quantity)
+                                dirty_fields.append('quantity')
                             except (ValueError, TypeError):
                                 pass
                     except InventoryItem.DoesNotExist:
@@ -507,7 +634,7 @@ def started_order_detail(request, order_id):
                     svc_text = ', '.join(services)
                     base_desc = order.description or ''
                     # Remove previous Services/Add-ons lines if exists
-                    lines = [l for l in base_desc.split('\n') if not (l.strip().lower().startswith('services:') or l.strip().lower().startswith('add-ons:') or l.strip().lower().startswith('tire services:'))]
+                    lines = [l for l in base_desc.split('\n') if not l.lstrip()[:16].lower().startswith(_SKIP_PREFIXES)]
 
                     # For sales orders, append as add-ons; for service orders, append as services
                     if order.type == 'sales':
@@ -516,15 +643,18 @@ def started_order_detail(request, order_id):
                         lines.append(f"Services: {svc_text}")
 
                     order.description = '\n'.join([l for l in lines if l.strip()])
+                    dirty_fields.append('description')
 
                 # Update estimated duration
                 if est:
                     try:
                         order.estimated_duration = int(est)
+                        dirty_fields.append('estimated_duration')
                     except Exception:
                         pass
 
-                order.save()
+                if dirty_fields:
+                    order.save(update_fields=dirty_fields)
                 # Redirect to refresh page and show changes
                 return redirect('tracker:started_order_detail', order_id=order.id)
             except Exception as e:
@@ -532,11 +662,18 @@ def started_order_detail(request, order_id):
 
         
         elif action == 'complete_order':
-            # Mark order as completed
-            order.status = 'completed'
-            order.completed_at = timezone.now()
-            order.save()
-            
+            # Mark order as completed with a single conditional UPDATE; a repeated
+            # submit (double click / rescan) matches no rows instead of re-stamping completed_at
+            updated = Order.objects.filter(pk=order.pk).exclude(status='completed').update(
+                status='completed',
+                completed_at=timezone.now()
+            )
+            if not updated:
+                messages.info(request, f'Order {order.order_number} is already completed.')
+            else:
+                # A completion can add an overrun to the branch's report
+                invalidate_overrun_report(order.branch_id)
+
             return redirect('tracker:started_orders_dashboard')
     
     active_tab = request.GET.get('tab', 'overview')
@@ -581,7 +718,7 @@ def api_update_order_from_extraction(request):
         order_id = request.POST.get('order_id')
 
         if not order_id:
-            return JsonResponse({
+            return ojson({
                 'success': False,
                 'error': 'Order ID is required'
             }, status=400)
@@ -611,40 +748,38 @@ def api_update_order_from_extraction(request):
 
         # Validate required fields
         if not customer_name or not phone:
-            return JsonResponse({
+            return ojson({
                 'success': False,
                 'error': 'Customer name and phone are required'
             }, status=400)
 
         if not customer_type:
-            return JsonResponse({
+            return ojson({
                 'success': False,
                 'error': 'Customer type is required'
             }, status=400)
 
-        if customer_type not in ['personal', 'company', 'government', 'ngo']:
-            return JsonResponse({
+        if customer_type not in _VALID_CUSTOMER_TYPES:
+            return ojson({
                 'success': False,
                 'error': 'Invalid customer type'
             }, status=400)
 
         # Validate customer type specific fields
         if customer_type == 'personal' and not personal_subtype:
-            return JsonResponse({
+            return ojson({
                 'success': False,
                 'error': 'Personal subtype is required for personal customers'
             }, status=400)
 
-        if customer_type in ['company', 'government', 'ngo']:
+        if customer_type in _ORG_CUSTOMERS:
             if not organization_name or not tax_number:
-                return JsonResponse({
+                return ojson({
                     'success': False,
                     'error': 'Organization name and tax number are required'
                 }, status=400)
 
         with transaction.atomic():
-            from .services import CustomerService, VehicleService
-
             # Update or create customer
             if customer_type == 'personal':
                 customer, _ = CustomerService.create_or_get_customer(
@@ -698,13 +833,13 @@ def api_update_order_from_extraction(request):
 
             # Update order fields
             order.description = final_description
-            order.priority = priority if priority in ['low', 'medium', 'high', 'urgent'] else 'medium'
+            order.priority = priority if priority in _VALID_PRIORITIES else 'medium'
             if est_duration:
                 order.estimated_duration = est_duration
 
             order.save()
 
-        return JsonResponse({
+        return ojson({
             'success': True,
             'message': 'Order updated successfully',
             'order_id': order.id,
@@ -713,7 +848,7 @@ def api_update_order_from_extraction(request):
 
     except Exception as e:
         logger.error(f"Error updating order from extraction: {str(e)}", exc_info=True)
-        return JsonResponse({
+        return ojson({
             'success': False,
             'error': f'Failed to update order: {str(e)}'
         }, status=500)
@@ -744,27 +879,17 @@ def api_create_order_from_modal(request):
       - vehicle_model: vehicle model (optional)
     """
     try:
+        now = timezone.now()
         user_branch = get_user_branch(request.user)
 
-        # Extract form data
-        order_type = request.POST.get('order_type', 'service').strip()
-        customer_type = request.POST.get('customer_type', 'personal').strip()
-        personal_subtype = request.POST.get('personal_subtype', '').strip()
-        organization_name = request.POST.get('organization_name', '').strip()
-        tax_number = request.POST.get('tax_number', '').strip()
-
-        customer_name = request.POST.get('customer_name', '').strip()
-        phone = request.POST.get('phone', '').strip()
-        email = request.POST.get('email', '').strip()
-        address = request.POST.get('address', '').strip()
-
-        description = request.POST.get('description', '').strip()
-        estimated_duration = request.POST.get('estimated_duration', '').strip()
-        priority = request.POST.get('priority', 'medium').strip()
-
-        plate_number = request.POST.get('plate_number', '').strip().upper()
-        vehicle_make = request.POST.get('vehicle_make', '').strip()
-        vehicle_model = request.POST.get('vehicle_model', '').strip()
+        # Extract form data in one pass over the known fields
+        post = request.POST
+        form = {name: (post.get(name, default) or '').strip() for name, default in _MODAL_FIELDS}
+        form['plate_number'] = form['plate_number'].upper()
+        order_type = form['order_type']
+        customer_type = form['customer_type']
+        customer_name = form['customer_name']
+        phone = form['phone']
 
         # Validate required fields
         if not customer_name or not phone:
@@ -773,86 +898,70 @@ def api_create_order_from_modal(request):
                 'error': 'Customer name and phone are required'
             }, status=400)
 
-        if order_type not in ['service', 'sales', 'inquiry', 'upload']:
+        if order_type not in _VALID_ORDER_TYPES:
             return JsonResponse({
                 'success': False,
                 'error': 'Invalid order type'
             }, status=400)
 
-        if customer_type not in ['personal', 'company', 'government', 'ngo']:
+        if customer_type not in _VALID_CUSTOMER_TYPES:
             return JsonResponse({
                 'success': False,
                 'error': 'Invalid customer type'
             }, status=400)
 
         # Validate customer type specific fields
-        if customer_type == 'personal' and not personal_subtype:
+        if customer_type == 'personal' and not form['personal_subtype']:
             return JsonResponse({
                 'success': False,
                 'error': 'Personal subtype is required for personal customers'
             }, status=400)
 
-        if customer_type in ['company', 'government', 'ngo']:
-            if not organization_name or not tax_number:
+        if customer_type in _ORG_CUSTOMERS:
+            if not form['organization_name'] or not form['tax_number']:
                 return JsonResponse({
                     'success': False,
                     'error': 'Organization name and tax number are required'
                 }, status=400)
 
-        with transaction.atomic():
-            from .services import CustomerService, VehicleService
-
-            # Create or get customer
-            if customer_type == 'personal':
-                customer, _ = CustomerService.create_or_get_customer(
-                    branch=user_branch,
-                    full_name=customer_name,
-                    phone=phone,
-                    customer_type=customer_type,
-                    personal_subtype=personal_subtype,
-                    email=email or None,
-                    address=address or None,
-                )
-            else:
-                customer, _ = CustomerService.create_or_get_customer(
-                    branch=user_branch,
-                    full_name=customer_name,
-                    phone=phone,
-                    customer_type=customer_type,
-                    organization_name=organization_name,
-                    tax_number=tax_number,
-                    email=email or None,
-                    address=address or None,
-                )
-
-            # Create or get vehicle if plate is provided
-            vehicle = None
-            if plate_number:
-                vehicle = VehicleService.create_or_get_vehicle(
-                    customer=customer,
-                    plate_number=plate_number,
-                    make=vehicle_make or None,
-                    model=vehicle_model or None,
-                )
-
-            # Parse estimated duration
-            try:
-                est_duration = int(estimated_duration) if estimated_duration else None
-            except (ValueError, TypeError):
-                est_duration = None
+        # Customer fields depend on the customer type
+        customer_data = {
+            'full_name': customer_name,
+            'phone': phone,
+            'customer_type': customer_type,
+            'email': form['email'] or None,
+            'address': form['address'] or None,
+        }
+        if customer_type == 'personal':
+            customer_data['personal_subtype'] = form['personal_subtype']
+        else:
+            customer_data['organization_name'] = form['organization_name']
+            customer_data['tax_number'] = form['tax_number']
+
+        # Parse estimated duration
+        try:
+            est_duration = int(form['estimated_duration']) if form['estimated_duration'] else None
+        except (ValueError, TypeError):
+            est_duration = None
 
-            # Create order
-            order = Order.objects.create(
-                customer=customer,
-                vehicle=vehicle,
-                branch=user_branch,
-                type=order_type,
-                status='created',
-                started_at=timezone.now(),
-                description=description or f"Order for {customer_name}",
-                priority=priority if priority in ['low', 'medium', 'high', 'urgent'] else 'medium',
-                estimated_duration=est_duration,
-            )
+        # Create or get customer and vehicle, then create the order, in one transaction
+        _, _, order = OrderService.create_with_relations(
+            branch=user_branch,
+            customer_data=customer_data,
+            vehicle_data={
+                'plate_number': form['plate_number'],
+                'make': form['vehicle_make'],
+                'model': form['vehicle_model'],
+            },
+            order_data={
+                'type': order_type,
+                'status': 'created',
+                'started_at': now,
+                'description': form['description'] or f"Order for {customer_name}",
+                'priority': form['priority'] if form['priority'] in _VALID_PRIORITIES else 'medium',
+                'estimated_duration': est_duration,
+            },
+        )
 
         # Return success response
         return JsonResponse({
@@ -863,6 +972,19 @@ def api_create_order_from_modal(request):
             'redirect_url': f'/tracker/orders/{order.id}/'
         }, status=201)
 
+    except IntegrityError as e:
+        # Duplicate/conflicting record: expected user error, no traceback needed
+        logger.warning(f"Integrity error creating order from modal: {e}")
+        return JsonResponse({
+            'success': False,
+            'error': 'Order conflicts with an existing record'
+        }, status=400)
+    except (ValidationError, ValueError) as e:
+        logger.warning(f"Invalid data creating order from modal: {e}")
+        return JsonResponse({
+            'success': False,
+            'error': f'Invalid order data: {e}'
+        }, status=400)
     except Exception as e:
         logger.error(f"Error creating order from modal: {str(e)}", exc_info=True)
         return JsonResponse({
@@ -880,16 +1002,25 @@ def api_record_overrun_reason(request, order_id):
     Returns { success: true }
     """
     try:
-        data = json.loads(request.body)
+        data = oloads(request.body)
+        if not isinstance(data, dict) or not isinstance(data.get('reason') or '', str):
+            logger.warning(f"Invalid overrun reason payload for order {order_id}")
+            return JsonResponse({'success': False, 'error': 'Invalid request data'}, status=400)
         reason = (data.get('reason') or '').strip()
         if not reason:
             return JsonResponse({'success': False, 'error': 'Reason is required'}, status=400)
         user_branch = get_user_branch(request.user)
-        order = get_object_or_404(Order, id=order_id, branch=user_branch)
-        order.overrun_reason = reason
-        order.overrun_reported_at = timezone.now()
-        order.overrun_reported_by = request.user
-        order.save(update_fields=['overrun_reason','overrun_reported_at','overrun_reported_by'])
+        # Queryset update() deliberately skips Order.save() and pre_save/post_save dispatch:
+        # no receiver in tracker.signals handles Order, and only these three columns change.
+        # If an Order save signal is ever added, revisit this write path.
+        updated = Order.objects.filter(id=order_id, branch=user_branch).update(
+            overrun_reason=reason,
+            overrun_reported_at=timezone.now(),
+            overrun_reported_by_id=request.user.pk,
+        )
+        if not updated:
+            return JsonResponse({'success': False, 'error': 'Order not found'}, status=404)
+        invalidate_overrun_report(user_branch.pk if user_branch else None)
         return JsonResponse({'success': True})
     except json.JSONDecodeError:
         return JsonResponse({'success': False, 'error': 'Invalid JSON'}, status=400)
@@ -898,13 +1029,10 @@ def api_record_overrun_reason(request, order_id):
         return JsonResponse({'success': False, 'error': str(e)}, status=500)
 
 
-@login_required
-def overrun_reports(request: HttpRequest):
-    """Page showing reported order overruns and KPIs to help staff analyze delays."""
-    from django.db.models import Count, Avg, F, Q, DurationField, ExpressionWrapper, IntegerField
-    from django.db.models.functions import Extract
+def _overrun_report_context(user_branch):
+    """Build the overrun report context (KPIs, top reasons, recent overruns) for a branch."""
+    from django.db.models import Count, F, Q, Case, When, Value, DurationField, ExpressionWrapper, IntegerField
 
-    user_branch = get_user_branch(request.user)
     qs = Order.objects.filter(status='completed').exclude(
         customer__full_name__startswith='Plate ',
         customer__phone__startswith='PLATE_'
@@ -929,57 +1057,78 @@ def overrun_reports(request: HttpRequest):
         )
     ).order_by('-completed_at')
 
-    total_overruns = overruns.count()
+    # Headline counts in a single aggregate query
+    unreported_q = Q(overrun_reason__isnull=True) | Q(overrun_reason='')
+    counts = overruns.aggregate(
+        total=Count('id'),
+        completed_late=Count('id', filter=Q(status='completed')),
+        unreported=Count('id', filter=unreported_q),
+    )
+    total_overruns = counts['total']
+
+    # Calculate actual delay in minutes for each overrun in the database.
+    # Use actual_duration if available (CASE avoids negative unsigned arithmetic on MySQL);
+    # rows without it get NULL here and are derived from their timestamps below.
+    delay_expr = Case(
+        When(Q(actual_duration__isnull=True) | Q(actual_duration=0), then=Value(None)),
+        When(actual_duration__gt=F('estimated_duration'), then=F('actual_duration') - F('estimated_duration')),
+        default=Value(0),
+        output_field=IntegerField(),
+    )
+    # Plain dict rows streamed straight from the cursor: no Order/User instances are built.
+    overrun_rows = overruns.annotate(delay_minutes=delay_expr).values(
+        'id', 'order_number', 'customer__full_name', 'overrun_reason',
+        'overrun_reported_by__username', 'overrun_reported_by__first_name', 'overrun_reported_by__last_name',
+        'overrun_reported_at', 'completed_at', 'started_at', 'estimated_duration', 'status', 'delay_minutes',
+    )[:100]  # Process up to 100 for performance
 
-    # Calculate actual delay in minutes for each overrun
-    # Use actual_duration if available, otherwise calculate from timestamps
     overruns_with_delay = []
-    for o in overruns[:100]:  # Process up to 100 for performance
-        try:
-            delay_minutes = None
-            if o.actual_duration and o.estimated_duration:
-                delay_minutes = max(0, int(o.actual_duration) - int(o.estimated_duration))
-            elif o.completed_at and o.started_at and o.estimated_duration:
-                elapsed = (o.completed_at - o.started_at).total_seconds() / 60  # Convert to minutes
-                delay_minutes = max(0, int(elapsed) - int(o.estimated_duration))
-            overruns_with_delay.append((o, delay_minutes))
-        except Exception as e:
-            logger.warning(f"Error calculating delay for order {o.id}: {e}")
-            overruns_with_delay.append((o, None))
+    for row in overrun_rows.iterator(chunk_size=100):
+        delay_minutes = row['delay_minutes']
+        if delay_minutes is None and row['completed_at'] and row['started_at']:
+            elapsed = (row['completed_at'] - row['started_at']).total_seconds() / 60  # Convert to minutes
+            delay_minutes = max(0, int(elapsed) - int(row['estimated_duration']))
+        overruns_with_delay.append((row, delay_minutes))
 
     # Calculate average delay
     delays_list = [d for _, d in overruns_with_delay if d is not None]
     avg_delay = sum(delays_list) / len(delays_list) if delays_list else 0
 
-    completed_late = overruns.filter(status='completed').count()
+    completed_late = counts['completed_late']
 
     # Top reasons (including unreported overruns)
     # Orders with recorded reasons
-    reasons_with_count = overruns.exclude(overrun_reason__isnull=True, overrun_reason='').values('overrun_reason').annotate(count=Count('id')).order_by('-count')[:10]
+    reasons_with_count = overruns.exclude(unreported_q).values('overrun_reason').annotate(count=Count('id')).order_by('-count')[:10]
     top_reasons = list(reasons_with_count)
 
     # Add "Reason not recorded" if there are unreported overruns
-    unreported_count = overruns.filter(Q(overrun_reason__isnull=True) | Q(overrun_reason='')).count()
+    unreported_count = counts['unreported']
     if unreported_count > 0:
         top_reasons.append({'overrun_reason': '(Reason not recorded)', 'count': unreported_count})
     top_reasons = sorted(top_reasons, key=lambda x: x['count'], reverse=True)
 
     # Recent overruns with all data
     recent = []
-    for o, delay_minutes in overruns_with_delay[:50]:
+    for row, delay_minutes in overruns_with_delay[:50]:
+        reporter = None
+        if row['overrun_reported_by__username']:
+            reporter = (
+                f"{row['overrun_reported_by__first_name'] or ''} {row['overrun_reported_by__last_name'] or ''}".strip()
+                or row['overrun_reported_by__username']
+            )
         recent.append({
-            'id': o.id,
-            'order_number': o.order_number,
-            'customer': o.customer.full_name if o.customer else 'Unknown',
-            'overrun_reason': o.overrun_reason or '(Reason not recorded)',
-            'overrun_reported_by': o.overrun_reported_by,
-            'overrun_reported_at': o.overrun_reported_at,
-            'completed_at': o.completed_at,
+            'id': row['id'],
+            'order_number': row['order_number'],
+            'customer': row['customer__full_name'] or 'Unknown',
+            'overrun_reason': row['overrun_reason'] or '(Reason not recorded)',
+            'overrun_reported_by': reporter,
+            'overrun_reported_at': row['overrun_reported_at'],
+            'completed_at': row['completed_at'],
             'delay_minutes': delay_minutes or 0,
-            'status': o.status,
+            'status': row['status'],
         })
 
-    context = {
+    return {
         'total_overruns': total_overruns,
         'avg_delay': round(avg_delay, 1) if avg_delay else 0,
         'completed_late': completed_late,
@@ -988,6 +1137,18 @@ def overrun_reports(request: HttpRequest):
         'recent_overruns': recent,
     }
 
+
+@login_required
+def overrun_reports(request: HttpRequest):
+    """Page showing reported order overruns and KPIs to help staff analyze delays."""
+    user_branch = get_user_branch(request.user)
+    # The whole context is cached so the KPIs, reasons and recent list always agree
+    cache_key = overrun_report_cache_key(user_branch.pk if user_branch else None)
+    context = cache.get(cache_key)
+    if context is None:
+        context = _overrun_report_context(user_branch)
+        cache.set(cache_key, context, _OVERRUN_SUMMARY_TTL)
+
     return render(request, 'tracker/overrun_reports.html', context)
 
 
@@ -999,35 +1160,10 @@ def api_started_orders_kpis(request):
     """API endpoint to get KPI stats for started orders dashboard (for AJAX updates)."""
     try:
         user_branch = get_user_branch(request.user)
-
-        # Include all started orders for accurate KPI counts
-        total_started = Order.objects.filter(
-            branch=user_branch,
-            status='created'
-        ).count()
-
-        today_started = Order.objects.filter(
-            branch=user_branch,
-            status='created',
-            started_at__date=timezone.now().date()
-        ).count()
-
-        # Calculate repeated vehicles today (vehicles with 2+ orders started today)
-        from django.db.models import Count
-        today_orders = Order.objects.filter(
-            branch=user_branch,
-            status='created',
-            started_at__date=timezone.now().date(),
-            vehicle__isnull=False
-        ).values('vehicle__plate_number').annotate(order_count=Count('id')).filter(order_count__gte=2)
-        repeated_vehicles_today = today_orders.count()
-
-        return JsonResponse({
-            'success': True,
-            'total_started': total_started,
-            'today_started': today_started,
-            'repeated_vehicles_today': repeated_vehicles_today
-        })
+        # Same local-date boundary as started_orders_dashboard so both report identical counts
+        today = timezone.localdate()
+        stats = _started_order_stats(user_branch, today)
+        return JsonResponse({'success': True, **stats})
     except Exception as e:
         logger.error(f"Error fetching started orders KPIs: {e}")
         return JsonResponse({'success': False, 'error': str(e)}, status=500)